@@ -1,6 +1,171 @@
-import pandas as pd
-from sympy import isprime, mod_inverse
-import random
+import array
+import functools
+import math
+import operator
+
+from _primes import choose_public_exponent, prod_tree, sample_primes
+
+try:
+    from gmpy2 import mpz, powmod
+except ImportError:  # 未安装gmpy2时退回内置的int和pow
+    mpz, powmod = int, pow
+
+try:
+    from _rsa_small import powmod_vec as _powmod_vec_c
+except ImportError:  # 未编译_rsa_small扩展时不使用
+    _powmod_vec_c = None
+
+
+# 模数小于2**32时两数乘积不超过uint64，可交给numba内核逐元素做模幂
+_SMALL_MODULUS = 1 << 32
+# _rsa_small扩展用128位中间结果，支持小于2**63的模数
+_C_EXTENSION_MODULUS = 1 << 63
+# 元素个数达到该值才交给numba内核，更短的输入调用开销超过收益，直接用gmpy2/内置pow更快
+_NUMBA_MIN_VALUES = 1024
+
+
+def _garner_coefficients(primes):
+    """
+    为Garner算法预计算各质数之前的前缀积及其模该质数的逆元。
+
+    参数:
+    - primes: 互不相同的质数列表。
+
+    返回:
+    - tuple: (前缀积列表, 逆元列表)。
+    """
+    prefixes = []
+    coefficients = []
+    prefix = 1
+    for p in primes:
+        prefixes.append(prefix)
+        coefficients.append(pow(prefix, -1, p))
+        prefix *= p
+    return prefixes, coefficients
+
+
+def _garner_combine(residues, primes, prefixes, coefficients):
+    """
+    用Garner算法把各质数下的余数合并为模全部质数乘积的唯一解。
+
+    参数:
+    - residues: 各质数下的余数。
+    - primes: 对应的质数列表。
+    - prefixes: _garner_coefficients返回的前缀积。
+    - coefficients: _garner_coefficients返回的逆元。
+
+    返回:
+    - int: 满足全部同余式、且小于质数乘积的整数。
+    """
+    x = 0
+    for r, p, prefix, c in zip(residues, primes, prefixes, coefficients):
+        x += (r - x) * c % p * prefix
+    return x
+
+
+@functools.lru_cache(maxsize=None)
+def _numba_kernels():
+    """
+    首次遇到足够长的输入时才导入numba内核模块，普通调用不必付出numba的导入开销。
+
+    返回:
+    - module: _powmod_numba模块；未安装numpy或numba时返回None。
+    """
+    try:
+        import _powmod_numba
+    except ImportError:
+        return None
+    return _powmod_numba
+
+
+def _compiled_powmod(values, exponent, modulus):
+    """
+    用编译实现对一组整数做同一模幂运算。优先使用_rsa_small扩展（modulus < 2**63），
+    其次使用按需导入的numba内核（modulus < 2**32且至少_NUMBA_MIN_VALUES个元素）。
+
+    参数:
+    - values: 整数序列，打包前先约简到[0, modulus)，负数和超过uint64的值也能处理；含非整数时抛出TypeError。
+    - exponent: 指数。
+    - modulus: 模数。
+
+    返回:
+    - list: 各元素模幂后的结果；没有可处理该模数的编译实现，或参数无法打包成uint64时返回None。
+    """
+    if _powmod_vec_c is not None and modulus < _C_EXTENSION_MODULUS:
+        try:
+            msg = array.array('Q', [operator.index(v) % modulus for v in values])
+            out = array.array('Q', bytes(msg.itemsize * len(msg)))
+            _powmod_vec_c(msg, exponent, modulus, out)
+        except OverflowError:
+            return None
+        return out.tolist()
+    if modulus >= _SMALL_MODULUS or len(values) < _NUMBA_MIN_VALUES:
+        return None
+    kernels = _numba_kernels()
+    if kernels is None:
+        return None
+    try:
+        return kernels.powmod_many([operator.index(v) % modulus for v in values], exponent, modulus)
+    except OverflowError:
+        return None
+
+
+def _powmod_many(values, exponent, modulus):
+    """
+    对一组整数做同一模幂运算：有可用的编译实现时交给_compiled_powmod，否则逐个调用gmpy2.powmod（或内置pow）。
+
+    参数:
+    - values: 非负整数序列。
+    - exponent: 指数。
+    - modulus: 模数。
+
+    返回:
+    - list: 各元素模幂后的结果。
+    """
+    result = _compiled_powmod(values, exponent, modulus)
+    if result is None:
+        exponent = mpz(exponent)
+        modulus = mpz(modulus)
+        result = [int(powmod(v, exponent, modulus)) for v in values]
+    return result
+
+
+@functools.lru_cache(maxsize=16)
+def _byte_codebook(e, n):
+    """
+    公钥(e, n)的字节密文表，初始为空，加密时只补上消息中新出现的字节值，之后同一公钥再遇到这些字节只需查表。
+
+    参数:
+    - e: 公钥e。
+    - n: 模数n。
+
+    返回:
+    - dict: 字节值b到b ** e mod n的映射。
+    """
+    return {}
+
+
+def _crt_combine(residues, moduli):
+    """
+    合并模数不一定两两互质的同余方程组x ≡ residues[i] (mod moduli[i])。
+
+    参数:
+    - residues: 各方程的余数。
+    - moduli: 各方程的模数。
+
+    返回:
+    - tuple: (x, 全部模数的最小公倍数)，其中0 <= x < 最小公倍数。
+    """
+    x, modulus = 0, 1
+    for r, q in zip(residues, moduli):
+        g = math.gcd(modulus, q)
+        if (r - x) % g:
+            raise ValueError("同余方程组无解。")
+        step = q // g
+        t = (r - x) // g * pow(modulus // g, -1, step) % step
+        x += modulus * t
+        modulus *= step
+    return x, modulus
 
 
 class RSA:
@@ -10,180 +175,200 @@ class RSA:
 
     def __init__(self):
         """
-        初始化方法，目前无需要初始化的属性，可根据后续扩展需求添加。
+        初始化方法，记录最近一次生成的质数向量，供私钥计算后按中国剩余定理（CRT）解密使用。
         """
-        pass
+        self.primes = None
+        self._crt_params = None
 
-    def generate_prime_vector(self, n, lower_bound=2, upper_bound=1000, max_attempts=10000):
+    def generate_prime_vector(self, n, lower_bound=2, upper_bound=1000):
         """
-        生成包含n个质数的向量。
+        生成包含n个互不相同的质数的向量（欧拉函数按各质数互异计算）。
 
         参数:
         - n: 要生成的质数的个数。
         - lower_bound: 生成质数的范围下限，默认为2。
         - upper_bound: 生成质数的范围上限，默认为1000。
-        - max_attempts: 生成每个质数时的最大尝试次数，避免无限循环，默认为10000。
 
         返回:
-        - pd.Series: 包含生成的质数的向量，索引为'p{i}'形式，i表示索引位置。
-        """
-        prime_vector = []
-        attempt_count = 0
-        while len(prime_vector) < n:
-            attempt_count += 1
-            if attempt_count > max_attempts:
-                raise ValueError(f"在 {max_attempts} 次尝试内无法生成 {n} 个质数，请检查生成范围或尝试次数设置。")
-            candidate = random.randint(lower_bound, upper_bound)
-            if isprime(candidate):
-                prime_vector.append(candidate)
-        return pd.Series(prime_vector, index=[f'p{i}' for i in range(len(prime_vector))])
+        - list: 包含生成的质数的列表。
+        """
+        prime_vector = sample_primes(n, lower_bound, upper_bound)
+        self.primes = prime_vector
+        self._crt_params = None
+        return prime_vector
 
     def calculate_product_vector(self, prime_vector):
         """
-        根据给定的质数向量计算乘积向量（n），实现向量中所有质数连乘。
+        根据给定的质数向量计算模数n，实现向量中所有质数连乘。
 
         参数:
         - prime_vector: 包含质数的输入向量。
 
         返回:
-        - pd.Series: 包含连乘结果的向量，索引为['n']。
+        - int: 所有质数的乘积n。
         """
-        product = 1
-        for prime in prime_vector:
-            product *= prime
-        return pd.Series([product], index=['n'])
+        return prod_tree(prime_vector)
 
     def calculate_phi_vector(self, prime_vector):
         """
-        根据给定的质数向量计算欧拉函数值向量（m）。
+        根据给定的质数向量计算欧拉函数值m。
 
         参数:
         - prime_vector: 包含质数的输入向量。
 
         返回:
-        - pd.Series: 包含欧拉函数值的向量，索引为['m']。
-        """
-        phi_value = 1
-        for prime in prime_vector:
-            phi_value *= (prime - 1)
-        return pd.Series([phi_value], index=['m'])
-
-    def choose_public_key(self, phi_vector):
-        """
-        选择公钥向量（e），随机生成一个满足与欧拉函数值互质条件的整数作为公钥。
-
-        参数:
-        - phi_vector: 包含欧拉函数值的向量。
-
-        返回:
-        - pd.Series: 包含公钥的向量，索引为['e']。
+        - int: 欧拉函数值m。
         """
-        m = phi_vector['m']
-        e = random.randint(2, m - 1)
-        while True:
-            if self.is_coprime(e, m):
-                break
-            e = random.randint(2, m - 1)
-        return pd.Series([e], index=['e'])
+        return prod_tree(int(prime) - 1 for prime in prime_vector)
 
-    def is_coprime(self, a, b):
+    def calculate_product_and_phi_vector(self, prime_vector):
         """
-        判断两个数是否互质。
+        一次遍历质数向量，同时计算模数n和欧拉函数值m。
 
         参数:
-        - a: 整数a。
-        - b: 整数b。
+        - prime_vector: 包含质数的输入向量。
 
         返回:
-        - bool: 如果a和b互质返回True，否则返回False。
+        - tuple: (n, m)。
         """
-        return self.greatest_common_divisor(a, b) == 1
+        primes = [int(prime) for prime in prime_vector]
+        product = prod_tree(primes)
+        phi_value = prod_tree([prime - 1 for prime in primes])
+        return product, phi_value
 
-    def greatest_common_divisor(self, a, b):
+    def choose_public_key(self, m):
         """
-        计算两个数的最大公约数，使用欧几里得算法。
+        选择公钥e，依次尝试65537、17、3，都不满足与欧拉函数值互质条件时，
+        从随机奇数起逐个检查后续奇数。
 
         参数:
-        - a: 整数a。
-        - b: 整数b。
+        - m: 欧拉函数值。
 
         返回:
-        - int: a和b的最大公约数。
+        - int: 公钥e。
         """
-        while b!= 0:
-            a, b = b, a % b
-        return a
+        return choose_public_exponent(m)
 
-    def calculate_private_key(self, public_key_vector, phi_vector):
+    def calculate_private_key(self, e, m):
         """
-        计算私钥向量（d），使用mod_inverse计算模逆元。
+        计算私钥d，使用内置pow(e, -1, m)计算模逆元。
+        若m正是最近生成的质数向量对应的欧拉函数值，则改为在各p-1下分别求e的逆元，
+        直接作为CRT解密的指数，再合并得到模lcm(p-1)的私钥d（与模m的逆元同样有效且更小）。
 
         参数:
-        - public_key_vector: 包含公钥的向量。
-        - phi_vector: 包含欧拉函数值的向量。
+        - e: 公钥e。
+        - m: 欧拉函数值。
 
         返回:
-        - pd.Series: 包含私钥的向量，索引为['d']，若无法计算模逆元则返回None。
+        - int: 私钥d，若无法计算模逆元则返回None。
         """
         try:
-            e = public_key_vector['e']
-            m = phi_vector['m']
-            d = mod_inverse(e, m)
-            return pd.Series([d], index=['d'])
+            if self.primes is None or prod_tree(p - 1 for p in self.primes) != m:
+                return pow(e, -1, m)
+            d_parts = [pow(e, -1, p - 1) for p in self.primes]
+            d, _ = _crt_combine(d_parts, [p - 1 for p in self.primes])
+            prefixes, coefficients = _garner_coefficients(self.primes)
+            # 指数为0时取p-1，保证密文被p整除时（如p=2）仍得到0而不是1
+            d_mods = [dp or p - 1 for dp, p in zip(d_parts, self.primes)]
+            key = (d, prod_tree(self.primes))
+            # 质数存为元组，解密时可作为缓存键，按密钥只构造一次uint64质数数组
+            self._crt_params = (key, tuple(self.primes), d_mods, prefixes, coefficients)
+            return d
         except ValueError:
             print("无法计算模逆元，公钥和phi值可能不符合要求，请检查输入。")
             return None
 
-    def encrypt(self, message, public_key_pair):
+    def encrypt(self, message, public_key):
         """
-        使用公钥对消息进行加密。
+        使用公钥对消息进行加密。同一(e, n)下相同字符的密文相同：每个不同的值只做一次模幂；字符串和bytes消息
+        的字节密文还会按公钥缓存，只为表中尚未出现的字节值计算。
 
         参数:
-        - message: 要加密的消息，可以是字符串或者整数列表（如果已经做过预处理）。
-        - public_key_pair: 包含公钥（e）和n的向量，索引为['e', 'n']。
+        - message: 要加密的消息，可以是字符串（按UTF-8编码为字节）、bytes或者整数列表（如果已经做过预处理）。
+        - public_key: 公钥对 (e, n)。
 
         返回:
         - list: 加密后的消息列表，每个元素对应消息中每个部分加密后的结果。
         """
         if isinstance(message, str):
-            message_int = [ord(char) for char in message]
+            message_int = message.encode('utf-8')
         else:
             message_int = message
 
-        encrypted_message = []
-        e = public_key_pair['e']
-        n = public_key_pair['n']
-        for char in message_int:
-            try:
-                encrypted_char = pow(char, int(e), int(n))
-                encrypted_message.append(encrypted_char)
-            except:
-                print("加密过程出现错误，请检查输入参数或算法实现。")
-                return None
-        return encrypted_message
+        e, n = public_key
+        try:
+            # 密钥可能是numpy整数等类型，统一转成int，后续缓存和编译实现都按int处理
+            e, n = int(e), int(n)
+            if n <= 0:
+                raise ValueError("模数n必须为正整数。")
+            if isinstance(message_int, (bytes, bytearray)):
+                table = _byte_codebook(e, n)
+                missing = [b for b in dict.fromkeys(message_int) if b not in table]
+                table.update(zip(missing, _powmod_many(missing, e, n)))
+            else:
+                distinct = list(dict.fromkeys(message_int))
+                table = dict(zip(distinct, _powmod_many(distinct, e, n)))
+        except (TypeError, ValueError, OverflowError):
+            print("加密过程出现错误，请检查输入参数或算法实现。")
+            return None
+        return [table[char] for char in message_int]
 
-    def decrypt(self, encrypted_message, private_key_pair):
+    def decrypt(self, encrypted_message, private_key, decode=False):
         """
-        使用私钥对加密后的消息进行解密。
+        使用私钥对加密后的消息进行解密。若私钥正是本实例最近计算出的私钥，则按CRT在各质数下分别做模幂再合并。
+        重复出现的密文只解密一次。
 
         参数:
         - encrypted_message: 加密后的消息列表。
-        - private_key_pair: 包含私钥（d）和n的向量，索引为['d', 'n']。
+        - private_key: 私钥对 (d, n)。
+        - decode: 原消息是字符串或bytes时设为True，把解密结果当作字节序列按UTF-8解码；
+          默认False，与整数列表消息一样返回各整数对应字符组成的字符串。
 
         返回:
-        - str: 解密后的消息字符串，如果输入的是整数列表形式的加密消息，则返回对应的字符组成的字符串。
+        - str: 解密后的消息字符串；decode为True但结果不是合法的UTF-8字节序列时返回None。
         """
-        decrypted_message_int = []
-        d = private_key_pair['d']
-        n = private_key_pair['n']
-        for char in encrypted_message:
+        distinct = list(dict.fromkeys(encrypted_message))
+        d, n = private_key
+        try:
+            d, n = int(d), int(n)
+            if n <= 0:
+                raise ValueError("模数n必须为正整数。")
+            if self._crt_params is not None and self._crt_params[0] == (d, n):
+                _, primes, d_mods, prefixes, coefficients = self._crt_params
+                # 按质数逐行计算：先对全部密文取模，再在该质数下批量模幂，最后逐个用Garner合并
+                # 密文足够多且n < 2**64时，先约简到[0, n)再一次广播取模得到全部余数（各质数都整除n，余数不变）
+                residue_matrix = None
+                if len(distinct) >= _NUMBA_MIN_VALUES and n < _SMALL_MODULUS ** 2:
+                    kernels = _numba_kernels()
+                    if kernels is not None:
+                        residue_matrix = kernels.residue_matrix(
+                            [operator.index(char) % n for char in distinct], primes)
+                columns = []
+                for i, (p, dm) in enumerate(zip(primes, d_mods)):
+                    if residue_matrix is not None:
+                        residues = residue_matrix[i]
+                    else:
+                        residues = [operator.index(char) % p for char in distinct]
+                    column = _compiled_powmod(residues, dm, p)
+                    if column is None:
+                        column = [pow(int(r), dm, p) for r in residues]
+                    columns.append(column)
+                decrypted_distinct = [_garner_combine(residues, primes, prefixes, coefficients)
+                                      for residues in zip(*columns)]
+            else:
+                decrypted_distinct = _powmod_many(distinct, d, n)
+        except (TypeError, ValueError, OverflowError):
+            print("解密过程出现错误，请检查输入参数或算法实现。")
+            return None
+        table = dict(zip(distinct, decrypted_distinct))
+        decrypted_message_int = [table[char] for char in encrypted_message]
+
+        if decode:
             try:
-                decrypted_char = pow(char, int(d), int(n))
-                decrypted_message_int.append(decrypted_char)
-            except:
-                print("解密过程出现错误，请检查输入参数或算法实现。")
+                return bytes(decrypted_message_int).decode('utf-8')
+            except ValueError:
+                print("解密结果不是合法的UTF-8字节序列，请检查私钥或decode参数。")
                 return None
-
         if all(isinstance(x, int) for x in decrypted_message_int):
             return ''.join(chr(x) for x in decrypted_message_int)
         return decrypted_message_int
@@ -196,26 +381,23 @@ if __name__ == "__main__":
     prime_vector = rsa.generate_prime_vector(8)
     print("生成的质数向量:", prime_vector)
 
-    # 计算乘积向量（n）
-    product_vector = rsa.calculate_product_vector(prime_vector)
-    print("乘积向量:", product_vector)
-
-    # 计算欧拉函数值向量（m）
-    phi_vector = rsa.calculate_phi_vector(prime_vector)
-    print("欧拉函数值向量:", phi_vector)
+    # 计算模数（n）和欧拉函数值（m）
+    n, m = rsa.calculate_product_and_phi_vector(prime_vector)
+    print("模数n:", n)
+    print("欧拉函数值m:", m)
 
-    # 选择公钥向量（e）
-    public_key_vector = rsa.choose_public_key(phi_vector)
-    print("公钥向量:", public_key_vector)
+    # 选择公钥（e）
+    e = rsa.choose_public_key(m)
+    print("公钥e:", e)
 
-    # 计算私钥向量（d）
-    private_key_vector = rsa.calculate_private_key(public_key_vector, phi_vector)
-    if private_key_vector is not None:
-        print("私钥向量:", private_key_vector)
+    # 计算私钥（d）
+    d = rsa.calculate_private_key(e, m)
+    if d is not None:
+        print("私钥d:", d)
 
-        # 公钥对和私钥对向量
-        public_key_pair = pd.Series([public_key_vector['e'], product_vector['n']], index=['e', 'n'])
-        private_key_pair = pd.Series([private_key_vector['d'], product_vector['n']], index=['d', 'n'])
+        # 公钥对和私钥对
+        public_key_pair = (e, n)
+        private_key_pair = (d, n)
 
         # 要加密的消息
         message = "Hell85988fgf fgfdgfdgfdgfyfo, RSA!"
@@ -227,7 +409,7 @@ if __name__ == "__main__":
             print("加密后的消息:", encrypted_message)
 
             # 解密消息
-            decrypted_message = rsa.decrypt(encrypted_message, private_key_pair)
+            decrypted_message = rsa.decrypt(encrypted_message, private_key_pair, decode=True)
             print("解密后的消息:", decrypted_message)
     else:
         print("私钥生成失败，无法进行加密解密操作。")
@@ -0,0 +1,157 @@
+"""
+小模数（n < 2**32）批量模幂的numba编译内核。只在一次处理的元素足够多时由544.py按需导入，
+避免普通调用也要付出numba的导入和编译开销；编译结果缓存在磁盘上，后续进程直接复用。
+"""
+import functools
+
+import numpy as np
+from numba import njit
+
+# Montgomery约简取R = 2**32；模数为奇数且小于2**31时t + m*n不超过uint64
+MONTGOMERY_BITS = 32
+MONTGOMERY_MODULUS = 1 << 31
+
+
+@njit(cache=True)
+def _powmod_vec(msg, e, n, out):
+    """
+    计算out[i] = msg[i] ** e mod n（从低位开始的平方-乘算法），要求n < 2**32。
+
+    参数:
+    - msg: uint64数组。
+    - e: uint64指数。
+    - n: uint64模数。
+    - out: 与msg等长的uint64输出数组。
+    """
+    one = np.uint64(1)
+    for i in range(msg.size):
+        r = one
+        b = msg[i] % n
+        ee = e
+        while ee:
+            if ee & one:
+                r = r * b % n
+            b = b * b % n
+            ee >>= one
+        out[i] = r
+
+
+@njit(cache=True)
+def _redc(t, n, n_prime):
+    """
+    Montgomery约简：返回t * R**-1 mod n，只用乘法、与运算和移位，不做除法。
+    """
+    mask = np.uint64(0xFFFFFFFF)
+    m = ((t & mask) * n_prime) & mask
+    u = (t + m * n) >> np.uint64(MONTGOMERY_BITS)
+    return u - n if u >= n else u
+
+
+@njit(cache=True)
+def _powmod_vec_mont(msg, e, n, n_prime, r2, out):
+    """
+    与_powmod_vec相同，但在Montgomery形式下做全部乘法，要求n为奇数且n < 2**31。
+
+    参数:
+    - msg: uint64数组。
+    - e: uint64指数。
+    - n: uint64模数。
+    - n_prime: -n**-1 mod R。
+    - r2: R**2 mod n。
+    - out: 与msg等长的uint64输出数组。
+    """
+    one = np.uint64(1)
+    for i in range(msg.size):
+        r = _redc(r2, n, n_prime)
+        b = _redc((msg[i] % n) * r2, n, n_prime)
+        ee = e
+        while ee:
+            if ee & one:
+                r = _redc(r * b, n, n_prime)
+            b = _redc(b * b, n, n_prime)
+            ee >>= one
+        out[i] = _redc(r, n, n_prime)
+
+
+class MontgomeryContext:
+    """
+    模数n的Montgomery参数，同一模数只需计算一次。
+    """
+
+    def __init__(self, n):
+        """
+        参数:
+        - n: 奇数模数，且n < 2**31。
+        """
+        r = 1 << MONTGOMERY_BITS
+        self.n = n
+        self.n_prime = pow(-n, -1, r)
+        self.r2 = pow(r, 2, n)
+
+
+@functools.lru_cache(maxsize=16)
+def montgomery_context(n):
+    """
+    按模数缓存Montgomery参数，同一密钥多次加解密时不再重复求逆。
+
+    参数:
+    - n: 奇数模数。
+
+    返回:
+    - MontgomeryContext: 模数n的Montgomery参数。
+    """
+    return MontgomeryContext(n)
+
+
+def powmod_many(values, exponent, modulus):
+    """
+    对一组整数做同一模幂运算，要求modulus < 2**32；奇数且小于2**31时改用Montgomery内核，以乘法和移位代替逐次取模。
+
+    参数:
+    - values: 已约简到[0, modulus)的整数序列或uint64数组。
+    - exponent: 指数。
+    - modulus: 模数。
+
+    返回:
+    - list: 各元素模幂后的结果。
+    """
+    msg = np.array(values, dtype=np.uint64)
+    out = np.empty_like(msg)
+    if modulus & 1 and modulus < MONTGOMERY_MODULUS:
+        ctx = montgomery_context(modulus)
+        _powmod_vec_mont(msg, np.uint64(exponent), np.uint64(modulus),
+                         np.uint64(ctx.n_prime), np.uint64(ctx.r2), out)
+    else:
+        _powmod_vec(msg, np.uint64(exponent), np.uint64(modulus), out)
+    return out.tolist()
+
+
+@functools.lru_cache(maxsize=16)
+def prime_column(primes):
+    """
+    按密钥缓存CRT质数的连续uint64列向量，同一私钥多次解密时不再从列表重新构造。
+
+    参数:
+    - primes: 小于2**64的质数组成的元组。
+
+    返回:
+    - np.ndarray: 形状为(len(primes), 1)的只读uint64数组。
+    """
+    column = np.array(primes, dtype=np.uint64)[:, np.newaxis]
+    column.flags.writeable = False
+    return column
+
+
+def residue_matrix(values, primes):
+    """
+    一次广播取模，得到全部值对全部质数的余数，第i行对应primes[i]，各行在内存中连续。
+
+    参数:
+    - values: 小于2**64的非负整数序列。
+    - primes: 小于2**64的质数组成的元组。
+
+    返回:
+    - np.ndarray: 形状为(len(primes), len(values))的uint64数组。
+    """
+    ciphertexts = np.array(values, dtype=np.uint64)
+    return ciphertexts[np.newaxis, :] % prime_column(primes)
@@ -0,0 +1,170 @@
+"""
+预先筛好的1000以内质数表，以及超出该范围时使用的筛法、Miller–Rabin素性检验和随机取质数的函数，
+另有544.py与sf.py共用的公钥指数选择和平衡乘积树连乘。
+"""
+import bisect
+import functools
+import math
+import random
+
+# 1000以内的全部质数
+PRIMES = (
+    2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71,
+    73, 79, 83, 89, 97, 101, 103, 107, 109, 113, 127, 131, 137, 139, 149, 151,
+    157, 163, 167, 173, 179, 181, 191, 193, 197, 199, 211, 223, 227, 229, 233,
+    239, 241, 251, 257, 263, 269, 271, 277, 281, 283, 293, 307, 311, 313, 317,
+    331, 337, 347, 349, 353, 359, 367, 373, 379, 383, 389, 397, 401, 409, 419,
+    421, 431, 433, 439, 443, 449, 457, 461, 463, 467, 479, 487, 491, 499, 503,
+    509, 521, 523, 541, 547, 557, 563, 569, 571, 577, 587, 593, 599, 601, 607,
+    613, 617, 619, 631, 641, 643, 647, 653, 659, 661, 673, 677, 683, 691, 701,
+    709, 719, 727, 733, 739, 743, 751, 757, 761, 769, 773, 787, 797, 809, 811,
+    821, 823, 827, 829, 839, 853, 857, 859, 863, 877, 881, 883, 887, 907, 911,
+    919, 929, 937, 941, 947, 953, 967, 971, 977, 983, 991, 997,
+)
+# PRIMES中全部质数之积，与候选数做一次gcd即可排除所有含1000以内质因子的候选数
+SMALL_PRIMORIAL = math.prod(PRIMES)
+# 上限不超过该值时直接用筛法建表，超过时改用Miller–Rabin逐个检验
+SIEVE_LIMIT = 1 << 20
+# 以前k个质数为底的Miller–Rabin对n < MILLER_RABIN_BOUNDS[k-1]是确定性的，超出最后一项时按14个底做概率检验
+MILLER_RABIN_BOUNDS = (
+    2047, 1373653, 25326001, 3215031751, 2152302898747, 3474749660383,
+    341550071728321, 341550071728321, 3825123056546413051,
+    3825123056546413051, 3825123056546413051,
+    318665857834031151167461, 3317044064679887385961981,
+)
+# 随机试探时每个质数、每个比特位允许的尝试次数（由素数定理，平均约需ln(upper_bound)次）
+ATTEMPTS_PER_BIT = 100
+# 优先尝试的常用公钥指数，与欧拉函数值互质时直接采用
+PREFERRED_PUBLIC_EXPONENTS = (65537, 17, 3)
+
+
+_PRIME_SET = frozenset(PRIMES)
+
+
+@functools.lru_cache(maxsize=None)
+def primes_up_to(upper_bound):
+    """
+    返回不超过upper_bound的全部质数，1000以内直接截取PRIMES，否则用埃拉托斯特尼筛法。
+
+    参数:
+    - upper_bound: 范围上限。
+
+    返回:
+    - tuple: 升序排列的质数元组，结果按upper_bound缓存。
+    """
+    if upper_bound <= PRIMES[-1]:
+        return PRIMES[:bisect.bisect_right(PRIMES, upper_bound)]
+    is_prime = bytearray([1]) * (upper_bound + 1)
+    is_prime[0] = is_prime[1] = 0
+    for i in range(2, math.isqrt(upper_bound) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = bytes(len(range(i * i, upper_bound + 1, i)))
+    return tuple(i for i, flag in enumerate(is_prime) if flag)
+
+
+def is_probable_prime(n):
+    """
+    Miller–Rabin素性检验，用于超出筛法范围的候选数。
+    先与SMALL_PRIMORIAL求一次gcd代替逐个试除，约92%的随机候选数在这一步被排除，不必进入模幂；
+    剩下的候选数按大小只取保证确定性所需的最少几个底。
+
+    参数:
+    - n: 待检验的整数。
+
+    返回:
+    - bool: n为质数返回True，否则返回False。
+    """
+    if n <= PRIMES[-1]:
+        return n in _PRIME_SET
+    if math.gcd(n, SMALL_PRIMORIAL) != 1:
+        return False
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in PRIMES[:bisect.bisect_right(MILLER_RABIN_BOUNDS, n) + 1]:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def sample_primes(count, lower_bound, upper_bound):
+    """
+    从[lower_bound, upper_bound]中随机取count个互不相同的质数。
+
+    参数:
+    - count: 要取的质数个数。
+    - lower_bound: 范围下限。
+    - upper_bound: 范围上限。
+
+    返回:
+    - list: 随机顺序的质数列表。
+    """
+    if upper_bound <= SIEVE_LIMIT:
+        primes = primes_up_to(upper_bound)
+        prime_pool = primes[bisect.bisect_left(primes, lower_bound):]
+        if len(prime_pool) < count:
+            raise ValueError(f"范围 [{lower_bound}, {upper_bound}] 内只有 {len(prime_pool)} 个质数，无法生成 {count} 个质数，请检查生成范围设置。")
+        return random.sample(prime_pool, count)
+
+    max_attempts = ATTEMPTS_PER_BIT * count * upper_bound.bit_length()
+    chosen = {}
+    for _ in range(max_attempts):
+        if len(chosen) == count:
+            break
+        candidate = random.randint(lower_bound, upper_bound)
+        if candidate not in chosen and is_probable_prime(candidate):
+            chosen[candidate] = None
+    if len(chosen) < count:
+        raise ValueError(f"在 {max_attempts} 次尝试内无法生成 {count} 个质数，请检查生成范围设置。")
+    return list(chosen)
+
+
+def choose_public_exponent(phi):
+    """
+    选择与phi互质的公钥指数：依次尝试PREFERRED_PUBLIC_EXPONENTS中小于phi的值，
+    都不满足时从随机奇数起逐个检查后续奇数，到达phi后回到3继续。
+
+    参数:
+    - phi: 欧拉函数值。
+
+    返回:
+    - int: 公钥指数e。
+    """
+    for e in PREFERRED_PUBLIC_EXPONENTS:
+        if e < phi and math.gcd(e, phi) == 1:
+            return e
+    e = random.randrange(3, phi, 2)
+    while math.gcd(e, phi) != 1:
+        e += 2
+        if e >= phi:
+            e = 3
+    return e
+
+
+def prod_tree(values):
+    """
+    以平衡乘积树计算连乘，使参与乘法的大整数位长保持接近，减少大数乘法的总代价。
+
+    参数:
+    - values: 整数序列，numpy整数等也会先转成int，避免定长整数溢出。
+
+    返回:
+    - int: 所有元素的乘积，空序列返回1。
+    """
+    values = [int(v) for v in values]
+    if not values:
+        return 1
+    while len(values) > 1:
+        paired = [a * b for a, b in zip(values[::2], values[1::2])]
+        if len(values) & 1:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
@@ -0,0 +1,75 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+小模数（n < 2**63）批量模幂的C扩展，供544.py在加解密时自动调用。
+
+编译（在本目录执行，生成的扩展模块与544.py放在一起即可被导入）:
+    CFLAGS="-O3 -march=native" cythonize -i _rsa_small.pyx
+"""
+from libc.stdint cimport uint64_t
+
+cdef extern from *:
+    ctypedef unsigned long long uint128_t "unsigned __int128"
+
+
+cdef inline uint64_t _redc(uint128_t t, uint64_t n, uint64_t n_prime) nogil:
+    """
+    Montgomery约简（R = 2**64）：返回t * R**-1 mod n，要求n为奇数且n < 2**63。
+    """
+    cdef uint64_t m = <uint64_t>t * n_prime
+    cdef uint64_t u = <uint64_t>((t + <uint128_t>m * n) >> 64)
+    return u - n if u >= n else u
+
+
+cdef inline uint64_t _neg_inverse(uint64_t n) nogil:
+    """
+    用牛顿迭代求-n**-1 mod 2**64，每轮正确位数翻倍（3 -> 6 -> ... -> 96）。
+    """
+    cdef uint64_t inv = n
+    cdef int i
+    for i in range(5):
+        inv *= 2 - n * inv
+    return 0 - inv
+
+
+def powmod_vec(const uint64_t[::1] msg, uint64_t e, uint64_t n, uint64_t[::1] out):
+    """
+    计算out[i] = msg[i] ** e mod n。n为奇数时在Montgomery形式下运算，否则用128位乘积直接取模。
+
+    参数:
+    - msg: uint64缓冲区（如array.array('Q')）。
+    - e: 指数。
+    - n: 模数，须小于2**63。
+    - out: 与msg等长的uint64输出缓冲区。
+    """
+    cdef Py_ssize_t i, size = msg.shape[0]
+    cdef uint64_t r, b, ee, n_prime, r1, r2
+    if n >= (<uint64_t>1) << 63:
+        raise ValueError("模数须小于2**63。")
+    if out.shape[0] != size:
+        raise ValueError("输出缓冲区长度与输入不一致。")
+    with nogil:
+        if n & 1:
+            n_prime = _neg_inverse(n)
+            r1 = (0 - n) % n
+            r2 = <uint64_t>((<uint128_t>r1 * r1) % n)
+            for i in range(size):
+                r = r1
+                b = _redc(<uint128_t>(msg[i] % n) * r2, n, n_prime)
+                ee = e
+                while ee:
+                    if ee & 1:
+                        r = _redc(<uint128_t>r * b, n, n_prime)
+                    b = _redc(<uint128_t>b * b, n, n_prime)
+                    ee >>= 1
+                out[i] = _redc(r, n, n_prime)
+        else:
+            for i in range(size):
+                r = 1 % n
+                b = msg[i] % n
+                ee = e
+                while ee:
+                    if ee & 1:
+                        r = <uint64_t>((<uint128_t>r * b) % n)
+                    b = <uint64_t>((<uint128_t>b * b) % n)
+                    ee >>= 1
+                out[i] = r
@@ -1,5 +1,4 @@
-import sympy  # 用于判断素数和进行一些数论相关操作
-import random
+from _primes import choose_public_exponent, prod_tree, sample_primes  # 预先筛好的素数表、随机取素数、公钥指数选择及乘积树连乘
 
 
 def extended_gcd(a, b):
@@ -9,28 +8,26 @@ def extended_gcd(a, b):
     :param b: 整数b
     :return: gcd(a, b), x, y
     """
-    if b == 0:
-        return a, 1, 0
-    gcd, x1, y1 = extended_gcd(b, a % b)
-    x = y1
-    y = x1 - (a // b) * y1
-    return gcd, x, y
+    old_r, r = a, b
+    old_x, x = 1, 0
+    old_y, y = 0, 1
+    while r:
+        q = old_r // r
+        old_r, r = r, old_r - q * r
+        old_x, x = x, old_x - q * x
+        old_y, y = y, old_y - q * y
+    return old_r, old_x, old_y
 
 
 def generate_primes(num_primes, lower_bound=100, upper_bound=1000):
     """
-    生成指定个数的大素数
+    生成指定个数、互不相同的大素数
     :param num_primes: 要生成的素数个数
     :param lower_bound: 素数生成范围下限（可调整）
     :param upper_bound: 素数生成范围上限（可调整）
     :return: 包含生成的素数的列表
     """
-    primes = []
-    while len(primes) < num_primes:
-        candidate = random.randint(lower_bound, upper_bound)
-        if sympy.isprime(candidate):
-            primes.append(candidate)
-    return primes
+    return sample_primes(num_primes, lower_bound, upper_bound)
 
 
 def generate_key_pair(num_primes):
@@ -40,24 +37,17 @@ def generate_key_pair(num_primes):
     :return: 公钥 (e, n) 和私钥 (d, n)
     """
     primes = generate_primes(num_primes)
-    n = 1
-    for prime in primes:
-        n *= prime
-    phi_n = 1
-    for prime in primes:
-        phi_n *= (prime - 1)
+    n = prod_tree(primes)
+    phi_n = prod_tree([prime - 1 for prime in primes])
 
-    # 选择e，使其与phi_n互质且满足范围要求
-    e = random.randint(2, phi_n - 1)
-    while sympy.gcd(e, phi_n)!= 1:
-        e = random.randint(2, phi_n - 1)
+    # 选择e，使其与phi_n互质且满足范围要求：先试常用指数，再从随机奇数起逐个检查
+    e = choose_public_exponent(phi_n)
 
     # 计算私钥d，通过扩展欧几里得算法解同余方程d * e ≡ 1 (mod phi_n)
     gcd, d, _ = extended_gcd(e, phi_n)
     if gcd!= 1:
         raise ValueError("计算私钥时出现问题，e和phi_n不互质")
-    while d < 0:
-        d += phi_n
+    d %= phi_n
     return (e, n), (d, n)
 
 